@@ -0,0 +1,379 @@
+import numpy as np
+import os
+import threading
+import time
+import wave
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AudioSource:
+    """
+    Base class for audio sources used by AudioRecorder.
+    Subclasses return blocks of int16 samples shaped (frames, channels).
+    """
+
+    def __init__(self, sample_rate=16000, channels=1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def open(self):
+        pass
+
+    def read(self, frames):
+        """Return the next block of up to `frames` samples, or None when the source is exhausted"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _PacedSource(AudioSource):
+    """Source that generates samples itself and paces them to real time"""
+
+    def open(self):
+        self._started = time.monotonic()
+        self._frames_read = 0
+
+    def _pace(self, frames):
+        # Sleep until the block would have been captured by a real device
+        due = self._started + (self._frames_read + frames) / self.sample_rate
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._frames_read += frames
+
+
+class SyntheticAudioSource(_PacedSource):
+    """Sine tone source for testing without a microphone"""
+
+    def __init__(self, sample_rate=16000, channels=1, frequency=440.0, amplitude=0.3):
+        super().__init__(sample_rate, channels)
+        self.frequency = frequency
+        self.amplitude = amplitude
+
+    def read(self, frames):
+        self._pace(frames)
+        t = (np.arange(frames) + self._frames_read - frames) / self.sample_rate
+        tone = (np.sin(2 * np.pi * self.frequency * t) * self.amplitude * 32767).astype(np.int16)
+        return np.repeat(tone[:, None], self.channels, axis=1)
+
+
+class WavFileAudioSource(_PacedSource):
+    """Plays a 16-bit PCM WAV file as if it were being captured live"""
+
+    def __init__(self, file_path, loop=False):
+        with wave.open(file_path, 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("only 16-bit PCM WAV files are supported")
+            super().__init__(wav.getframerate(), wav.getnchannels())
+        self.file_path = file_path
+        self.loop = loop
+        self._wav = None
+
+    def open(self):
+        super().open()
+        self._wav = wave.open(self.file_path, 'rb')
+
+    def read(self, frames):
+        data = self._wav.readframes(frames)
+        if not data and self.loop:
+            self._wav.rewind()
+            data = self._wav.readframes(frames)
+        if not data:
+            return None
+
+        block = np.frombuffer(data, dtype='<i2').reshape(-1, self.channels)
+        self._pace(len(block))
+        return block
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class MicrophoneAudioSource(AudioSource):
+    """Default input device through the optional `sounddevice` package"""
+
+    def __init__(self, sample_rate=16000, channels=1, device=None):
+        super().__init__(sample_rate, channels)
+        self.device = device
+        self._stream = None
+
+    def open(self):
+        try:
+            import sounddevice
+        except ImportError:
+            raise RuntimeError("Microphone capture requires the sounddevice package (pip install sounddevice)")
+
+        self._stream = sounddevice.InputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype='int16',
+            device=self.device
+        )
+        self._stream.start()
+
+    def read(self, frames):
+        block, overflowed = self._stream.read(frames)
+        if overflowed:
+            logger.warning("Microphone input overflowed")
+        return block
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class AudioRingBuffer:
+    """
+    Single-producer/single-consumer ring of audio samples and block timestamps.
+
+    The capture thread only advances the write counters and the consumer only
+    advances the read counters, and each counter is published after the data
+    it covers is in place, so neither side takes a lock. If the consumer falls
+    behind, new blocks are dropped and counted rather than overwriting unread
+    data; the next block that fits records how many samples went missing before it.
+    """
+
+    def __init__(self, capacity, channels, max_blocks=4096):
+        self.capacity = capacity
+        self.max_blocks = max_blocks
+        self.samples = np.zeros((capacity, channels), dtype=np.int16)
+        self.block_ends = np.zeros(max_blocks, dtype=np.int64)     # Total samples written at end of block
+        self.block_clocks = np.zeros(max_blocks, dtype=np.float64)  # Monotonic time the block was captured
+        self.block_gaps = np.zeros(max_blocks, dtype=np.int64)     # Samples dropped just before the block
+        self.write_pos = 0
+        self.blocks_written = 0
+        self.read_pos = 0
+        self.blocks_read = 0
+        self.dropped_samples = 0
+        self._unreported_gap = 0
+
+    def write(self, block, clock):
+        """Append a block captured at `clock` (producer side); returns False if it was dropped"""
+        n = len(block)
+        if (self.write_pos + n - self.read_pos > self.capacity
+                or self.blocks_written - self.blocks_read >= self.max_blocks):
+            self.dropped_samples += n
+            self._unreported_gap += n
+            return False
+
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self.samples[start:start + first] = block[:first]
+        self.samples[:n - first] = block[first:]
+
+        slot = self.blocks_written % self.max_blocks
+        self.block_ends[slot] = self.write_pos + n
+        self.block_clocks[slot] = clock
+        self.block_gaps[slot] = self._unreported_gap
+        self._unreported_gap = 0
+
+        # Publish samples, then the block that describes them
+        self.write_pos += n
+        self.blocks_written += 1
+        return True
+
+    def read_blocks(self):
+        """Take every published block (consumer side) as a list of (clock, samples, gap)"""
+        available = self.blocks_written
+        blocks = []
+        while self.blocks_read < available:
+            slot = self.blocks_read % self.max_blocks
+            end = int(self.block_ends[slot])
+            clock = float(self.block_clocks[slot])
+            gap = int(self.block_gaps[slot])
+
+            start = self.read_pos % self.capacity
+            n = end - self.read_pos
+            first = min(n, self.capacity - start)
+            data = np.concatenate([self.samples[start:start + first], self.samples[:n - first]])
+            blocks.append((clock, data, gap))
+
+            self.read_pos = end
+            self.blocks_read += 1
+        return blocks
+
+
+class AudioRecorder:
+    """
+    Captures audio alongside a VideoRecorder and cuts it on the video's chunk
+    boundaries. Blocks are laid down back to back on a continuous sample
+    timeline anchored to the first block's time.monotonic() stamp, the same
+    clock VideoRecorder uses for chunk boundaries. Samples dropped by the ring
+    buffer advance the timeline by exactly their count; the timeline is only
+    re-synced to a block's stamp when it is off by more than
+    RESYNC_THRESHOLD_SECONDS, so scheduling jitter never cuts or overlaps audio.
+    """
+
+    # Larger than typical stamp jitter, far smaller than one block
+    RESYNC_THRESHOLD_SECONDS = 0.005
+
+    def __init__(self, source, block_frames=1024, buffer_seconds=30):
+        """
+        Initialize the audio recorder.
+
+        Args:
+            source: AudioSource to capture from
+            block_frames: Samples read from the source per block
+            buffer_seconds: Ring buffer capacity in seconds of audio
+        """
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.channels = source.channels
+        self.block_frames = block_frames
+        self.ring = AudioRingBuffer(int(buffer_seconds * self.sample_rate), self.channels)
+        self.is_capturing = False
+        self.resyncs = 0
+        self._thread = None
+        self._anchor_clock = None  # Monotonic time of sample 0 on the timeline
+        self._next_index = 0       # Timeline position of the next block's first sample
+        self._lagging = None       # Offset of the previous block if it lagged past the threshold
+        self._pending = []         # (timeline position, samples, clock offset) not yet written
+        self._latest_clock = 0.0
+
+    def start(self):
+        """Open the source and start the capture thread"""
+        self.source.open()
+        self.is_capturing = True
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and close the source"""
+        self.is_capturing = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.source.close()
+
+    def _capture_loop(self):
+        try:
+            while self.is_capturing:
+                block = self.source.read(self.block_frames)
+                clock = time.monotonic()
+                if block is None:
+                    logger.info("Audio source exhausted")
+                    break
+                if not self.ring.write(block, clock):
+                    logger.warning("Audio ring buffer full, dropping block")
+        except Exception as e:
+            logger.error(f"Error capturing audio: {e}")
+        finally:
+            self.is_capturing = False
+
+    def _clock_to_index(self, clock):
+        return int(round((clock - self._anchor_clock) * self.sample_rate))
+
+    def drain(self):
+        """Move captured blocks out of the ring; called regularly by the consumer (video) thread"""
+        for clock, samples, gap in self.ring.read_blocks():
+            # The block's stamp is when its last sample arrived
+            first_clock = clock - len(samples) / self.sample_rate
+            if self._anchor_clock is None:
+                self._anchor_clock = first_clock
+                self._next_index = 0
+            self._next_index += gap
+
+            # Positive when the timeline runs ahead of the clock (fast device),
+            # negative when it lags (slow device, late stamp, lost samples)
+            offset = self._next_index - self._clock_to_index(first_clock)
+            threshold = self.RESYNC_THRESHOLD_SECONDS * self.sample_rate
+            if offset > threshold or (offset < -threshold and self._lagging is not None):
+                # A single late stamp is jitter; lost samples delay every block
+                # after them, so a lag is only trusted once the next block confirms it
+                shift = offset if offset > threshold else max(offset, self._lagging)
+                logger.warning(f"Audio timeline off by {shift / self.sample_rate * 1000:.1f}ms, re-syncing")
+                if offset < 0 and self._pending:
+                    index, previous, previous_offset = self._pending[-1]
+                    self._pending[-1] = (index - shift, previous, previous_offset - shift)
+                self._next_index -= shift
+                offset -= shift
+                self.resyncs += 1
+                self._lagging = None
+            else:
+                self._lagging = offset if offset < -threshold else None
+
+            self._pending.append((self._next_index, samples, offset))
+            self._next_index += len(samples)
+            self._latest_clock = clock
+
+    def write_segment(self, start_clock, end_clock, file_path, video_frames=None, fps=None):
+        """
+        Write the audio between two monotonic timestamps to a WAV file.
+
+        Gaps (dropped blocks) are filled with silence so the file is exactly
+        as long as the segment and stays aligned with the video.
+
+        Args:
+            start_clock: time.monotonic() at the chunk's first frame
+            end_clock: time.monotonic() after the chunk's last frame
+            file_path: WAV file to write
+            video_frames: Frames written to the video chunk, for drift stats
+            fps: Frame rate the video chunk was encoded at, for drift stats
+
+        Returns:
+            dict of audio metadata and drift statistics for the chunk
+        """
+        # Give the capture thread a moment to deliver the block covering end_clock
+        wait_until = time.monotonic() + 2 * self.block_frames / self.sample_rate
+        self.drain()
+        while self.is_capturing and self._latest_clock < end_clock and time.monotonic() < wait_until:
+            time.sleep(0.005)
+            self.drain()
+
+        expected = max(0, int(round((end_clock - start_clock) * self.sample_rate)))
+        output = np.zeros((expected, self.channels), dtype=np.int16)
+        covered = np.zeros(expected, dtype=bool)
+        clock_offset = None
+
+        remaining = []
+        if self._anchor_clock is not None:
+            segment_start = self._clock_to_index(start_clock)
+            for index, samples, offset in self._pending:
+                position = index - segment_start
+                src_start = max(0, -position)
+                src_end = min(len(samples), expected - position)
+                if src_start < src_end:
+                    output[position + src_start:position + src_end] = samples[src_start:src_end]
+                    covered[position + src_start:position + src_end] = True
+                    # Stamps are only ever late, which pushes the offset down;
+                    # the largest one in the segment is the best estimate
+                    clock_offset = offset if clock_offset is None else max(clock_offset, offset)
+                if position + len(samples) > expected:
+                    # Part of this block belongs to the next chunk
+                    remaining.append((index, samples, offset))
+        self._pending = remaining
+
+        with wave.open(file_path, 'wb') as wav:
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(output.astype('<i2').tobytes())
+
+        captured = int(covered.sum())
+        audio_seconds = expected / self.sample_rate if self.sample_rate else 0.0
+        info = {
+            'audio_file_name': os.path.basename(file_path),
+            'audio_file_path': file_path,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'samples': expected,
+            'missing_samples': expected - captured,
+            'dropped_samples_total': self.ring.dropped_samples,
+            'resyncs_total': self.resyncs,
+            # How far the sample timeline has run ahead of (positive) or behind
+            # (negative) the monotonic clock since the last re-sync
+            'clock_drift_ms': (clock_offset or 0) / self.sample_rate * 1000 if self.sample_rate else 0.0,
+            # Audio length vs. how long the video chunk plays at its nominal fps
+            'av_drift_ms': None
+        }
+        if video_frames is not None and fps:
+            info['av_drift_ms'] = (audio_seconds - video_frames / fps) * 1000
+        return info
@@ -0,0 +1,225 @@
+from database import SessionLocal
+from models import VideoChunk, ChunkSignature
+import cv2
+import numpy as np
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sampled frames. Sampling by time rather than a fixed frame
+# count keeps long chunks densely covered, so a short event cannot fall
+# between samples and let the chunk be purged as a duplicate
+SAMPLE_INTERVAL_SECONDS = 1.0
+
+# Frame rate assumed when a file does not report one
+DEFAULT_FPS = 30
+
+# Side of the downscaled grayscale frame; HASH_SIZE * HASH_SIZE bits per frame
+HASH_SIZE = 8
+
+# VideoRecorder stamps the user name and clock into the top of every frame;
+# that band is cropped before hashing so the ticking clock does not make
+# otherwise identical frames differ
+OVERLAY_FRACTION = 90 / 480
+
+# Mean differing bits per sampled frame at or below which frames count as the same
+DUPLICATE_THRESHOLD = 5
+
+
+def hash_frame(frame):
+    """Average hash of a frame, as a 64-bit integer"""
+    top = int(frame.shape[0] * OVERLAY_FRACTION)
+    gray = cv2.cvtColor(frame[top:], cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (HASH_SIZE, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).flatten()
+    return np.packbits(bits).view('>u8')[0]
+
+
+def compute_signature(file_path, sample_interval=SAMPLE_INTERVAL_SECONDS):
+    """
+    Compute a chunk's perceptual signature from one frame every
+    `sample_interval` seconds, plus the last frame.
+
+    Returns:
+        numpy uint64 array with one hash per sampled frame, or None if the
+        file could not be read
+    """
+    cap = cv2.VideoCapture(file_path)
+    if not cap.isOpened():
+        return None
+
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count <= 0:
+            return None
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        step = max(1, int(round(fps * sample_interval)))
+        positions = np.unique(np.append(np.arange(0, frame_count, step), frame_count - 1))
+        hashes = []
+        for position in positions:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = cap.read()
+            if ret:
+                hashes.append(hash_frame(frame))
+
+        if not hashes:
+            return None
+        return np.array(hashes, dtype=np.uint64)
+    finally:
+        cap.release()
+
+
+def signature_to_hex(signature):
+    return ''.join(f"{int(h):016x}" for h in signature)
+
+
+def hex_to_signature(value):
+    return np.array([int(value[i:i + 16], 16) for i in range(0, len(value), 16)], dtype=np.uint64)
+
+
+def _bit_distances(a, b):
+    """Differing bits between paired 64-bit hashes"""
+    diff = np.bitwise_xor(a, b)
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def signature_distance(a, b):
+    """Mean differing bits per sampled frame between two signatures"""
+    length = min(len(a), len(b))
+    if length == 0:
+        return float(HASH_SIZE * HASH_SIZE)
+    return float(_bit_distances(a[:length], b[:length]).mean())
+
+
+def is_static(signature):
+    """True if every sampled frame looks like the first one"""
+    if len(signature) < 2:
+        return True
+    return bool(_bit_distances(signature[1:], np.full(len(signature) - 1, signature[0], dtype=np.uint64)).max()
+                <= DUPLICATE_THRESHOLD)
+
+
+def score_chunk(chunk_id):
+    """
+    Compute and index the signature of one chunk.
+
+    The chunk is compared with the first chunk of the run its predecessor in
+    the same session belongs to (rather than the predecessor itself) so slow
+    drift, e.g. daylight changing, cannot chain a long run of duplicates.
+    Already-scored chunks are left alone, so this is safe to call repeatedly.
+
+    Returns:
+        The ChunkSignature row, or None if the chunk could not be scored
+    """
+    db = SessionLocal()
+    try:
+        if db.query(ChunkSignature).filter(ChunkSignature.chunk_id == chunk_id).first():
+            return None
+
+        chunk = db.query(VideoChunk).filter(VideoChunk.id == chunk_id).first()
+        if not chunk or not os.path.exists(chunk.file_path):
+            return None
+
+        signature = compute_signature(chunk.file_path)
+        if signature is None:
+            logger.warning(f"Could not compute signature for chunk {chunk_id}")
+            return None
+
+        static = is_static(signature)
+        duplicate_of = None
+        distance = None
+
+        # Previous scored chunk from the same session (or user, for chunks without one)
+        previous_query = db.query(ChunkSignature).join(
+            VideoChunk, VideoChunk.id == ChunkSignature.chunk_id
+        ).filter(VideoChunk.start_time < chunk.start_time)
+        if chunk.session_id:
+            previous_query = previous_query.filter(VideoChunk.session_id == chunk.session_id)
+        else:
+            previous_query = previous_query.filter(VideoChunk.user_name == chunk.user_name)
+        previous = previous_query.order_by(VideoChunk.start_time.desc()).first()
+
+        if previous is not None and static:
+            root_id = previous.duplicate_of or previous.chunk_id
+            root = previous if root_id == previous.chunk_id else db.query(ChunkSignature).filter(
+                ChunkSignature.chunk_id == root_id
+            ).first()
+            if root is not None and root.is_static:
+                distance = signature_distance(signature, hex_to_signature(root.signature))
+                if distance <= DUPLICATE_THRESHOLD:
+                    duplicate_of = root_id
+
+        chunk_signature = ChunkSignature(
+            chunk_id=chunk.id,
+            session_id=chunk.session_id,
+            user_name=chunk.user_name,
+            signature=signature_to_hex(signature),
+            is_static=static,
+            duplicate_of=duplicate_of,
+            distance=distance
+        )
+        db.add(chunk_signature)
+        db.commit()
+        db.refresh(chunk_signature)
+
+        if duplicate_of:
+            logger.info(f"Chunk {chunk_id} duplicates chunk {duplicate_of} (distance {distance:.2f})")
+        return chunk_signature
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error scoring chunk {chunk_id}: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def unscored_chunk_ids(db, limit=None):
+    """Ids of chunks that have no signature yet, oldest first"""
+    query = db.query(VideoChunk.id).outerjoin(
+        ChunkSignature, ChunkSignature.chunk_id == VideoChunk.id
+    ).filter(ChunkSignature.id.is_(None)).order_by(VideoChunk.start_time)
+    if limit:
+        query = query.limit(limit)
+    return [row.id for row in query.all()]
+
+
+def reassign_runs(db, deleted_chunk_ids):
+    """
+    Keep duplicate runs consistent before chunks are deleted.
+
+    When a run's first chunk is among the deleted ones, its oldest surviving
+    duplicate becomes the new first chunk and the rest of the run is
+    re-compared against it; chunks that no longer match it stop being duplicates.
+    Otherwise a duplicates-only purge would delete every remaining copy.
+    Changes are added to `db`; the caller commits them with the delete.
+    """
+    deleted = set(deleted_chunk_ids)
+    if not deleted:
+        return
+
+    orphans = db.query(ChunkSignature).join(
+        VideoChunk, VideoChunk.id == ChunkSignature.chunk_id
+    ).filter(
+        ChunkSignature.duplicate_of.in_(deleted),
+        ChunkSignature.chunk_id.notin_(deleted)
+    ).order_by(ChunkSignature.duplicate_of, VideoChunk.start_time).all()
+
+    runs = {}
+    for signature in orphans:
+        runs.setdefault(signature.duplicate_of, []).append(signature)
+
+    for members in runs.values():
+        root = members[0]
+        root.duplicate_of = None
+        root.distance = None
+        root_signature = hex_to_signature(root.signature)
+        for member in members[1:]:
+            distance = signature_distance(hex_to_signature(member.signature), root_signature)
+            if distance <= DUPLICATE_THRESHOLD:
+                member.duplicate_of = root.chunk_id
+                member.distance = distance
+            else:
+                member.duplicate_of = None
+                member.distance = None
@@ -0,0 +1,247 @@
+import cv2
+import glob
+import hashlib
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_offset(value):
+    """
+    Parse a session offset into seconds.
+    Accepts plain seconds ("760", "760.5") or clock notation ("12:40", "1:02:03").
+    """
+    value = str(value).strip()
+    if not value:
+        raise ValueError("offset cannot be empty")
+
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+
+    if seconds < 0:
+        raise ValueError("offset cannot be negative")
+    return seconds
+
+
+class ClipExtractor:
+    """
+    Cuts a time range out of a recording session that may span several chunks.
+    Results are cached on disk by (session, start, end) plus the chunks that
+    cover the range, so repeated requests are served straight from the cache
+    while deleted or newly finished chunks produce a fresh extract. The cache
+    is bounded: after each new extract the least recently used entries are
+    evicted until it is back under its size and count limits.
+    """
+
+    def __init__(self, cache_dir="recordings/extracts", max_cache_bytes=2 * 1024 ** 3, max_cache_entries=200):
+        """
+        Initialize the clip extractor.
+
+        Args:
+            cache_dir: Directory where extracted clips are cached
+            max_cache_bytes: Total size the cache is trimmed to (default: 2 GiB)
+            max_cache_entries: Number of extracts the cache is trimmed to (default: 200)
+        """
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.max_cache_entries = max_cache_entries
+        self._evict_lock = threading.Lock()
+        self.codec = cv2.VideoWriter_fourcc(*'mp4v')
+        self.default_fps = 30
+
+        # One lock per cache entry so concurrent requests for the same range
+        # extract it once while different ranges proceed in parallel;
+        # cache_path -> [lock, number of requests using it]
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+        Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def get_cache_path(self, session_id, start_seconds, end_seconds, session_start, chunks):
+        """
+        Cache file name for a session range, keyed to the millisecond.
+        A digest of the session start and the covering chunks' ids and end
+        times is part of the name, so the entry changes whenever they do.
+        """
+        start_ms = int(round(start_seconds * 1000))
+        end_ms = int(round(end_seconds * 1000))
+        source = session_start.isoformat() + ';' + ';'.join(
+            f"{chunk.id}:{chunk.end_time.isoformat()}" for chunk in chunks
+        )
+        digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{session_id}_{start_ms}_{end_ms}_{digest}.mp4")
+
+    def purge_session(self, session_id):
+        """Delete every cached extract of a session, e.g. after its chunks were deleted"""
+        for path in glob.glob(os.path.join(self.cache_dir, f"{glob.escape(session_id)}_*.mp4")):
+            if path.endswith('.tmp.mp4'):
+                continue  # Being written; its key no longer matches the remaining chunks
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not delete cached extract {path}: {e}")
+
+    def _touch(self, cache_path):
+        """Mark an entry as recently used; mtime is used since atime is often not updated"""
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass  # Evicted or purged meanwhile
+
+    def _evict(self, keep_path):
+        """Remove least recently used extracts until the cache is within its limits"""
+        with self._evict_lock:
+            entries = []
+            for path in glob.glob(os.path.join(self.cache_dir, "*.mp4")):
+                if path.endswith('.tmp.mp4') or path == keep_path:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            if os.path.exists(keep_path):
+                total_bytes += os.path.getsize(keep_path)
+            count = len(entries) + 1
+
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_cache_bytes and count <= self.max_cache_entries:
+                    break
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Could not evict cached extract {path}: {e}")
+                    continue
+                total_bytes -= size
+                count -= 1
+                logger.info(f"Evicted cached extract {path}")
+
+    @contextmanager
+    def _locked(self, cache_path):
+        """Hold the per-entry lock; the entry is dropped once nobody uses it"""
+        with self._locks_guard:
+            entry = self._locks.setdefault(cache_path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[cache_path]
+
+    def extract(self, session_id, session_start, chunks, start_seconds, end_seconds):
+        """
+        Extract [start_seconds, end_seconds) of a session into a single mp4.
+
+        Args:
+            session_id: Session identifier, used for the cache key
+            session_start: datetime the session's first chunk started
+            chunks: VideoChunk rows overlapping the range, ordered by start_time
+            start_seconds: Range start as an offset from session_start
+            end_seconds: Range end as an offset from session_start
+
+        Returns:
+            Path to the extracted (possibly cached) clip, or None if no frames
+            fell inside the range
+        """
+        cache_path = self.get_cache_path(session_id, start_seconds, end_seconds, session_start, chunks)
+        if os.path.exists(cache_path):
+            logger.info(f"Serving cached extract {cache_path}")
+            self._touch(cache_path)
+            return cache_path
+
+        with self._locked(cache_path):
+            # Another request may have produced it while we waited
+            if os.path.exists(cache_path):
+                self._touch(cache_path)
+                return cache_path
+
+            range_start = session_start + timedelta(seconds=start_seconds)
+            range_end = session_start + timedelta(seconds=end_seconds)
+            tmp_path = cache_path + '.tmp.mp4'
+
+            writer = None
+            frames_written = 0
+            try:
+                for chunk in chunks:
+                    writer, written = self._copy_chunk_range(chunk, range_start, range_end, writer, tmp_path)
+                    frames_written += written
+            finally:
+                if writer is not None:
+                    writer.release()
+
+            if frames_written == 0:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return None
+
+            # Publish atomically so readers never see a partial file
+            os.replace(tmp_path, cache_path)
+            logger.info(f"Extracted {frames_written} frames to {cache_path}")
+            self._evict(cache_path)
+            return cache_path
+
+    def _copy_chunk_range(self, chunk, range_start, range_end, writer, output_path):
+        """
+        Append the frames of one chunk that fall inside the range to writer.
+
+        The chunk's wall-clock start_time/end_time are mapped linearly onto its
+        frame count, so the cut stays accurate even when the camera delivered
+        frames at a different rate than the nominal fps.
+        """
+        if not os.path.exists(chunk.file_path):
+            logger.warning(f"Skipping missing chunk file {chunk.file_path}")
+            return writer, 0
+
+        cap = cv2.VideoCapture(chunk.file_path)
+        if not cap.isOpened():
+            logger.warning(f"Cannot open chunk file {chunk.file_path}")
+            return writer, 0
+
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            span = (chunk.end_time - chunk.start_time).total_seconds()
+            if frame_count <= 0 or span <= 0:
+                return writer, 0
+
+            offset_start = max(0.0, (range_start - chunk.start_time).total_seconds())
+            offset_end = min(span, (range_end - chunk.start_time).total_seconds())
+            first_frame = int(offset_start / span * frame_count)
+            last_frame = min(frame_count, int(round(offset_end / span * frame_count)))
+            if first_frame >= last_frame:
+                return writer, 0
+
+            # Seeking lands on the preceding keyframe and decodes forward to the
+            # requested frame, so only the leading partial GOP is decoded needlessly
+            if first_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+
+            written = 0
+            for _ in range(first_frame, last_frame):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                if writer is None:
+                    fps = cap.get(cv2.CAP_PROP_FPS) or self.default_fps
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(output_path, self.codec, fps, (width, height))
+                    if not writer.isOpened():
+                        raise IOError(f"Cannot create video writer for {output_path}")
+
+                writer.write(frame)
+                written += 1
+
+            return writer, written
+        finally:
+            cap.release()
@@ -0,0 +1,303 @@
+"""
+Load generator for the REST API.
+
+Simulates N users concurrently registering, starting and stopping
+recordings, polling status and listing/downloading videos, then reports
+latency percentiles, throughput, error rates and database pool usage.
+
+Run against an in-process server in test mode (SQLite + synthetic frames):
+    python load_test.py --users 20 --duration 60
+
+Or against a server you started yourself with VIDEOCHUNKS_TEST_MODE=1:
+    python load_test.py --base-url http://localhost:5000 --users 20
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+# Collapse ids and usernames so results are grouped per endpoint
+PATH_PATTERNS = [
+    (re.compile(r'^/api/video/\d+/download$'), '/api/video/<id>/download'),
+    (re.compile(r'^/api/recording-status/[^/]+$'), '/api/recording-status/<username>'),
+    (re.compile(r'^/api/videos/[^/]+$'), '/api/videos/<username>'),
+]
+
+
+def endpoint_name(method, path):
+    path = path.split('?')[0]
+    for pattern, name in PATH_PATTERNS:
+        if pattern.match(path):
+            path = name
+            break
+    return f"{method} {path}"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadStats:
+    """Thread-safe collector of per-endpoint latencies and status codes"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.chunk_mismatches = []
+        self.pool_samples = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+            # Network failures (status 0) and server errors count as errors
+            if status == 0 or status >= 500:
+                self.errors[endpoint] += 1
+
+    def record_chunk_mismatch(self, username, expected, saved):
+        """Chunks reported by stop-recording that never showed up in the user's video list"""
+        with self._lock:
+            self.chunk_mismatches.append({'username': username, 'expected': expected, 'saved': saved})
+            self.errors[endpoint_name('POST', '/api/stop-recording')] += 1
+
+    def record_pool(self, sample):
+        with self._lock:
+            self.pool_samples.append(sample)
+
+    def report(self, elapsed):
+        endpoints = {}
+        total_requests = 0
+        total_errors = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            total_requests += len(values)
+            total_errors += self.errors[endpoint]
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors[endpoint],
+                'error_rate': self.errors[endpoint] / len(values),
+                'statuses': dict(self.statuses[endpoint]),
+                'p50_ms': percentile(values, 50) * 1000,
+                'p90_ms': percentile(values, 90) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000
+            }
+
+        pool = {}
+        if self.pool_samples:
+            last = self.pool_samples[-1]
+            max_checked_out = max(s.get('checkedout', 0) for s in self.pool_samples)
+            pool = {
+                'pool_class': last.get('pool_class'),
+                'size': last.get('size'),
+                'max_overflow': last.get('max_overflow'),
+                'max_checked_out': max_checked_out,
+                # QueuePool reports overflow as negative while below its base size
+                'max_overflow_in_use': max(0, max(s.get('overflow', 0) for s in self.pool_samples)),
+                'samples': len(self.pool_samples)
+            }
+            capacity = (last.get('size') or 0) + max(last.get('max_overflow') or 0, 0)
+            if capacity:
+                pool['peak_saturation'] = max_checked_out / capacity
+
+        return {
+            'elapsed_seconds': elapsed,
+            'total_requests': total_requests,
+            'total_errors': total_errors,
+            'error_rate': total_errors / total_requests if total_requests else 0.0,
+            'throughput_rps': total_requests / elapsed if elapsed else 0.0,
+            'chunk_mismatches': self.chunk_mismatches,
+            'endpoints': endpoints,
+            'db_pool': pool
+        }
+
+
+class ApiClient:
+    """Minimal JSON client that times every request into LoadStats"""
+
+    def __init__(self, base_url, stats, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+
+        started = time.perf_counter()
+        status = 0
+        payload = None
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                status = response.status
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+            payload = e.read()
+        except Exception:
+            status = 0
+        finally:
+            self.stats.record(endpoint_name(method, path), time.perf_counter() - started, status)
+
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            # Downloads return file bytes rather than JSON
+            return status, None
+
+
+def simulate_user(client, stats, username, deadline, recording_seconds, poll_interval):
+    """One virtual user's session loop"""
+    client.request('POST', '/api/users/register', {'username': username, 'email': f'{username}@example.com'})
+    client.request('POST', '/api/users/login', {'username': username})
+
+    # Chunks stop-recording has reported so far; every one should be listed for the user
+    expected_chunks = 0
+
+    while time.monotonic() < deadline:
+        status, _ = client.request('POST', '/api/start-recording', {
+            'username': username,
+            'total_duration_seconds': 60,
+            'chunk_duration_seconds': 30
+        })
+
+        stopped = False
+        if status == 200:
+            stop_at = min(deadline, time.monotonic() + recording_seconds)
+            while time.monotonic() < stop_at:
+                client.request('GET', f'/api/recording-status/{username}')
+                time.sleep(poll_interval)
+            status, data = client.request('POST', '/api/stop-recording', {'username': username})
+            if status == 200 and data:
+                expected_chunks += data.get('total_chunks', 0)
+                stopped = True
+
+        status, data = client.request('GET', f'/api/videos/{username}')
+        if stopped and status == 200 and data and data.get('total_chunks') != expected_chunks:
+            stats.record_chunk_mismatch(username, expected_chunks, data.get('total_chunks'))
+            expected_chunks = data.get('total_chunks') or 0  # Report each loss once
+        client.request('GET', '/api/videos')
+        if status == 200 and data and data.get('chunks'):
+            client.request('GET', f"/api/video/{data['chunks'][-1]['id']}/download")
+
+
+def sample_pool(client, stats, stop_event, interval):
+    while not stop_event.is_set():
+        try:
+            with urllib.request.urlopen(client.base_url + '/api/db-pool-status', timeout=5) as response:
+                stats.record_pool(json.loads(response.read()))
+        except Exception:
+            pass
+        stop_event.wait(interval)
+
+
+def start_local_server():
+    """Start the app in test mode on a free local port; returns its base URL"""
+    os.environ['VIDEOCHUNKS_TEST_MODE'] = '1'
+    import logging
+    from werkzeug.serving import make_server
+    from main import app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='load-test-server')
+    thread.daemon = True
+    thread.start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def print_report(report):
+    print(f"\nRequests: {report['total_requests']}  "
+          f"Throughput: {report['throughput_rps']:.1f} req/s  "
+          f"Errors: {report['total_errors']} ({report['error_rate']:.2%})  "
+          f"Elapsed: {report['elapsed_seconds']:.1f}s\n")
+
+    for mismatch in report['chunk_mismatches']:
+        print(f"Chunk mismatch for {mismatch['username']}: stop-recording reported {mismatch['expected']}, "
+              f"{mismatch['saved']} saved")
+    if report['chunk_mismatches']:
+        print()
+
+    header = f"{'Endpoint':<42}{'Reqs':>7}{'Err%':>7}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, row in report['endpoints'].items():
+        print(f"{endpoint:<42}{row['requests']:>7}{row['error_rate']:>7.1%}"
+              f"{row['p50_ms']:>8.1f}ms{row['p90_ms']:>7.1f}ms{row['p95_ms']:>7.1f}ms"
+              f"{row['p99_ms']:>7.1f}ms{row['max_ms']:>7.1f}ms")
+
+    pool = report['db_pool']
+    if pool:
+        print(f"\nDB pool ({pool['pool_class']}): size={pool['size']} max_overflow={pool['max_overflow']} "
+              f"peak checked out={pool['max_checked_out']} peak overflow={pool['max_overflow_in_use']}"
+              + (f" peak saturation={pool['peak_saturation']:.0%}" if 'peak_saturation' in pool else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the video recording API")
+    parser.add_argument('--base-url', help="Server to test; default starts one in-process in test mode")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users (default: 10)")
+    parser.add_argument('--duration', type=float, default=60, help="Test duration in seconds (default: 60)")
+    parser.add_argument('--recording-seconds', type=float, default=5,
+                        help="How long each user records before stopping (default: 5)")
+    parser.add_argument('--poll-interval', type=float, default=0.5,
+                        help="Seconds between status polls while recording (default: 0.5)")
+    parser.add_argument('--json', dest='json_path', help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    base_url = args.base_url or start_local_server()
+    stats = LoadStats()
+    client = ApiClient(base_url, stats)
+    run_id = int(time.time())
+
+    stop_sampling = threading.Event()
+    sampler = threading.Thread(target=sample_pool, args=(client, stats, stop_sampling, 0.5))
+    sampler.daemon = True
+    sampler.start()
+
+    print(f"Running {args.users} user(s) against {base_url} for {args.duration:.0f}s...")
+    started = time.monotonic()
+    deadline = started + args.duration
+    users = [
+        threading.Thread(
+            target=simulate_user,
+            args=(client, stats, f"load_{run_id}_{i}", deadline, args.recording_seconds, args.poll_interval)
+        )
+        for i in range(args.users)
+    ]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    stop_sampling.set()
+    sampler.join(timeout=5)
+
+    report = stats.report(elapsed)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+    # Non-zero exit lets CI fail the run on server errors and lost chunks
+    return 1 if report['total_errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,5 +1,5 @@
 from flask import Flask, render_template
-from route import api_bp
+from route import api_bp, recording_scheduler
 from database import init_db
 import logging
 import os
@@ -25,6 +25,16 @@ with app.app_context():
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
 
+    # Start scheduled recordings once the tables exist. With the debug reloader
+    # this module is also imported by the file watcher process, which must not
+    # start recordings itself.
+    is_reloader_watcher = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+    if not is_reloader_watcher:
+        try:
+            recording_scheduler.start()
+        except Exception as e:
+            logger.error(f"Error starting recording scheduler: {e}")
+
 # Create recordings directory if it doesn't exist
 os.makedirs('recordings', exist_ok=True)
 
@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text
 from datetime import datetime
 
 class User(Base):
@@ -27,6 +27,8 @@ class VideoChunk(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     clip_id = Column(Integer, nullable=False)  # Sequential clip number
+    session_id = Column(String(64), nullable=True, index=True)  # Recording session the chunk belongs to
+    session_start_time = Column(DateTime, nullable=True)  # First frame of the session; extract offsets start here
     user_id = Column(Integer, nullable=False)  # Foreign key to users table
     user_name = Column(String(255), nullable=False)
     recording_date = Column(DateTime, nullable=False, default=datetime.utcnow)  # Date of recording
@@ -45,6 +47,8 @@ class VideoChunk(Base):
         return {
             'id': self.id,
             'clip_id': self.clip_id,
+            'session_id': self.session_id,
+            'session_start_time': self.session_start_time.isoformat() if self.session_start_time else None,
             'user_id': self.user_id,
             'user_name': self.user_name,
             'recording_date': self.recording_date.isoformat(),
@@ -55,4 +59,103 @@ class VideoChunk(Base):
             'duration_seconds': self.duration_seconds,
             'chunk_duration_seconds': self.chunk_duration_seconds,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class AudioTrack(Base):
+    __tablename__ = 'audio_tracks'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chunk_id = Column(Integer, nullable=False, unique=True, index=True)  # Foreign key to video_chunks table
+    file_name = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    sample_rate = Column(Integer, nullable=False)
+    channels = Column(Integer, nullable=False)
+    samples = Column(Integer, nullable=False)
+    missing_samples = Column(Integer, nullable=False, default=0)  # Silence inserted for dropped samples
+    clock_drift_ms = Column(Float, nullable=True)  # Sample timeline vs. monotonic clock
+    av_drift_ms = Column(Float, nullable=True)  # Audio length vs. video length at nominal fps
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AudioTrack(chunk_id='{self.chunk_id}', file_name='{self.file_name}')>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'chunk_id': self.chunk_id,
+            'file_name': self.file_name,
+            'file_path': self.file_path,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'samples': self.samples,
+            'missing_samples': self.missing_samples,
+            'clock_drift_ms': self.clock_drift_ms,
+            'av_drift_ms': self.av_drift_ms,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class ChunkSignature(Base):
+    __tablename__ = 'chunk_signatures'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chunk_id = Column(Integer, nullable=False, unique=True, index=True)  # Foreign key to video_chunks table
+    session_id = Column(String(64), nullable=True, index=True)
+    user_name = Column(String(255), nullable=False, index=True)
+    signature = Column(Text, nullable=False)  # Hex encoded 64-bit hash per sampled frame
+    is_static = Column(Boolean, nullable=False, default=False)  # Sampled frames are all alike
+    duplicate_of = Column(Integer, nullable=True, index=True)  # First chunk of the identical run, if any
+    distance = Column(Float, nullable=True)  # Mean differing bits per frame vs. the run's first chunk
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChunkSignature(chunk_id='{self.chunk_id}', duplicate_of='{self.duplicate_of}')>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'chunk_id': self.chunk_id,
+            'session_id': self.session_id,
+            'user_name': self.user_name,
+            'is_static': self.is_static,
+            'duplicate_of': self.duplicate_of,
+            'distance': self.distance,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class RecordingSchedule(Base):
+    __tablename__ = 'recording_schedules'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)  # Foreign key to users table
+    user_name = Column(String(255), nullable=False, index=True)
+    run_at = Column(DateTime, nullable=True)  # One-off start time; NULL for recurring schedules
+    days_of_week = Column(String(20), nullable=True)  # Recurring days, e.g. "0,2,4" (Monday=0); NULL = every day
+    time_of_day = Column(String(5), nullable=True)  # Recurring start time "HH:MM"
+    duration_seconds = Column(Integer, nullable=False)  # Length of each recording window
+    chunk_duration_seconds = Column(Integer, nullable=False, default=180)
+    device_index = Column(Integer, nullable=False, default=0)  # OpenCV capture device
+    enabled = Column(Boolean, nullable=False, default=True)
+    last_started_at = Column(DateTime, nullable=True)  # Start of the last window that was recorded
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RecordingSchedule(user_name='{self.user_name}', run_at='{self.run_at}', time_of_day='{self.time_of_day}')>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'user_name': self.user_name,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'days_of_week': [int(d) for d in self.days_of_week.split(',')] if self.days_of_week else None,
+            'time_of_day': self.time_of_day,
+            'duration_seconds': self.duration_seconds,
+            'chunk_duration_seconds': self.chunk_duration_seconds,
+            'device_index': self.device_index,
+            'enabled': self.enabled,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'created_at': self.created_at.isoformat()
+        }
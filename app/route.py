@@ -1,11 +1,20 @@
-from flask import Blueprint, jsonify, request, send_file
-from models import VideoChunk, User
-from database import SessionLocal, init_db
-from video_recorder import VideoRecorder
-from datetime import datetime
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+from models import VideoChunk, User, RecordingSchedule, ChunkSignature, AudioTrack
+from database import SessionLocal, init_db, get_pool_status, TEST_MODE
+from video_recorder import VideoRecorder, SyntheticVideoRecorder
+from audio_recorder import AudioRecorder, SyntheticAudioSource, MicrophoneAudioSource
+from clip_extractor import ClipExtractor, parse_offset
+from scheduler import RecordingScheduler, find_overlap
+from chunk_signatures import score_chunk, unscored_chunk_ids, reassign_runs
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
 import os
 import logging
+import tarfile
 import threading
+import uuid
+import zipfile
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +22,149 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 class RecordingSession:
     """Track recording session state"""
-    def __init__(self, username, user_id, total_duration, chunk_duration):
+    def __init__(self, username, user_id, total_duration, chunk_duration, session_id=None):
         self.username = username
         self.user_id = user_id
         self.total_duration = total_duration
         self.chunk_duration = chunk_duration
+        self.session_id = session_id or uuid.uuid4().hex
         self.clip_count = 0
         self.is_active = True
         self.start_time = datetime.now()
+        self.recording_start = None  # First frame, saved with every chunk as the session's time origin
         self.thread = None
         self.recorder = None
 
 # Global variable to track recording state
 recording_threads = {}
 
+# Recorder used for new sessions; test mode records synthetic frames instead of the webcam
+RECORDER_CLASS = SyntheticVideoRecorder if TEST_MODE else VideoRecorder
+
+# Worker threads used to unlink files during bulk deletes
+BULK_DELETE_WORKERS = 8
+
+# Read size used when streaming chunk files into an export archive
+EXPORT_READ_SIZE = 1024 * 1024
+
+# Audio sources selectable through the start-recording endpoint
+AUDIO_SOURCES = {
+    'microphone': MicrophoneAudioSource,
+    'synthetic': SyntheticAudioSource
+}
+
+# Signatures are computed off the recording thread, one chunk at a time so each
+# chunk is compared against an already-indexed predecessor
+signature_executor = ThreadPoolExecutor(max_workers=1)
+
+# Shared extractor so its per-range locks and cache are reused across requests
+clip_extractor = ClipExtractor(cache_dir=os.path.join("recordings", "extracts"))
+
+
+def is_user_recording(username):
+    """True if the user has a recording that is still running"""
+    thread_info = recording_threads.get(username)
+    return bool(thread_info and thread_info['is_active'] and thread_info['thread'].is_alive())
+
+
+def launch_recording_session(username, user_id, total_duration, chunk_duration, recorder=None, audio_source=None):
+    """
+    Start a recording thread for a user and register it in recording_threads.
+    Shared by the start-recording endpoint and the recording scheduler.
+    If audio_source is given, audio is captured and saved next to each chunk.
+    """
+    # Create recorder instance unless the caller supplied one (e.g. prewarmed by the scheduler)
+    if recorder is None:
+        recorder = RECORDER_CLASS(
+            user_name=username,
+            chunk_duration_seconds=chunk_duration,
+            total_duration_seconds=total_duration,
+            output_dir="recordings"
+        )
+    if audio_source is not None:
+        recorder.audio_recorder = AudioRecorder(audio_source)
+
+    # Create recording session to track clip count
+    session = RecordingSession(username, user_id, total_duration, chunk_duration, session_id=recorder.session_id)
+
+    def save_chunk_callback(chunk_info):
+        """Callback to save chunk info to database"""
+        try:
+            db = SessionLocal()
+            session.clip_count += 1
+            if session.recording_start is None:
+                session.recording_start = chunk_info['record_start_time']
+
+            video_chunk = VideoChunk(
+                clip_id=session.clip_count,
+                session_id=session.session_id,
+                session_start_time=session.recording_start,
+                user_id=user_id,
+                user_name=chunk_info['user_name'],
+                recording_date=datetime.now(),
+                file_name=chunk_info['file_name'],
+                file_path=chunk_info['file_path'],
+                start_time=chunk_info['record_start_time'],
+                end_time=chunk_info['record_end_time'],
+                duration_seconds=int(chunk_info['duration']),
+                chunk_duration_seconds=chunk_duration
+            )
+
+            db.add(video_chunk)
+            db.commit()
+            chunk_id = video_chunk.id
+
+            audio = chunk_info.get('audio')
+            if audio:
+                db.add(AudioTrack(
+                    chunk_id=chunk_id,
+                    file_name=audio['audio_file_name'],
+                    file_path=audio['audio_file_path'],
+                    sample_rate=audio['sample_rate'],
+                    channels=audio['channels'],
+                    samples=audio['samples'],
+                    missing_samples=audio['missing_samples'],
+                    clock_drift_ms=audio['clock_drift_ms'],
+                    av_drift_ms=audio['av_drift_ms']
+                ))
+                db.commit()
+            db.close()
+
+            logger.info(f"Chunk {session.clip_count} saved to database: {chunk_info['file_name']}")
+
+            # Index the new chunk for duplicate detection
+            signature_executor.submit(score_chunk, chunk_id)
+        except Exception as e:
+            logger.error(f"Error saving chunk to database: {e}")
+    
+    # Start recording in a separate thread
+    thread = recorder.start_recording_thread(callback=save_chunk_callback)
+
+    # Store thread reference with session
+    session.thread = thread
+    session.recorder = recorder
+    recording_threads[username] = {
+        'thread': thread,
+        'recorder': recorder,
+        'is_active': True,
+        'start_time': datetime.now(),
+        'user_id': user_id,
+        'total_duration': total_duration,
+        'chunk_duration': chunk_duration,
+        'session': session
+    }
+    
+    return session
+
+
+# Starts and stops scheduled recordings; started from main.py
+recording_scheduler = RecordingScheduler(
+    start_session=launch_recording_session,
+    is_recording=is_user_recording,
+    output_dir="recordings",
+    recorder_class=RECORDER_CLASS
+)
+
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -39,6 +177,16 @@ def health_check():
         return jsonify({"status": "unhealthy", "error": str(e)}), 500
 
 
+@api_bp.route('/db-pool-status', methods=['GET'])
+def db_pool_status():
+    """Database connection pool usage"""
+    try:
+        return jsonify(get_pool_status()), 200
+    except Exception as e:
+        logger.error(f"Error getting pool status: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ==================== USER MANAGEMENT ====================
 
 @api_bp.route('/users/register', methods=['POST'])
@@ -168,7 +316,8 @@ def start_recording():
     Request body: {
         "username": "john_doe",
         "total_duration_seconds": 900,      (optional, default: 900 = 15 min)
-        "chunk_duration_seconds": 180       (optional, default: 180 = 3 min)
+        "chunk_duration_seconds": 180,      (optional, default: 180 = 3 min)
+        "audio": "microphone"               (optional, "microphone" or "synthetic"; default: no audio)
     }
     """
     try:
@@ -176,10 +325,14 @@ def start_recording():
         username = data.get('username', '').strip()
         total_duration = int(data.get('total_duration_seconds', 900))
         chunk_duration = int(data.get('chunk_duration_seconds', 180))
+        audio = (data.get('audio') or '').strip().lower()
         
         if not username:
             return jsonify({"error": "username is required"}), 400
         
+        if audio and audio not in AUDIO_SOURCES:
+            return jsonify({"error": f"audio must be one of: {', '.join(AUDIO_SOURCES)}"}), 400
+        
         # Validate durations
         if total_duration < 60:
             return jsonify({"error": "total_duration_seconds must be at least 60 seconds"}), 400
@@ -198,69 +351,21 @@ def start_recording():
         db.close()
         
         # Check if already recording for this user
-        if username in recording_threads and recording_threads[username]['is_active']:
+        if is_user_recording(username):
             return jsonify({"error": f"Recording already in progress for user {username}"}), 409
         
-        # Create recorder instance
-        recorder = VideoRecorder(
-            user_name=username,
-            chunk_duration_seconds=chunk_duration,
-            total_duration_seconds=total_duration,
-            output_dir="recordings"
+        audio_source = AUDIO_SOURCES[audio]() if audio else None
+        session = launch_recording_session(
+            username, user_id, total_duration, chunk_duration, audio_source=audio_source
         )
-
-        # Create recording session to track clip count
-        session = RecordingSession(username, user_id, total_duration, chunk_duration)
-
-        def save_chunk_callback(chunk_info):
-            """Callback to save chunk info to database"""
-            try:
-                db = SessionLocal()
-                session.clip_count += 1
-
-                video_chunk = VideoChunk(
-                    clip_id=session.clip_count,
-                    user_id=user_id,
-                    user_name=chunk_info['user_name'],
-                    recording_date=datetime.now(),
-                    file_name=chunk_info['file_name'],
-                    file_path=chunk_info['file_path'],
-                    start_time=chunk_info['record_start_time'],
-                    end_time=chunk_info['record_end_time'],
-                    duration_seconds=int(chunk_info['duration']),
-                    chunk_duration_seconds=chunk_duration
-                )
-
-                db.add(video_chunk)
-                db.commit()
-                db.close()
-
-                logger.info(f"Chunk {session.clip_count} saved to database: {chunk_info['file_name']}")
-            except Exception as e:
-                logger.error(f"Error saving chunk to database: {e}")
-        
-        # Start recording in a separate thread
-        thread = recorder.start_recording_thread(callback=save_chunk_callback)
-
-        # Store thread reference with session
-        session.thread = thread
-        session.recorder = recorder
-        recording_threads[username] = {
-            'thread': thread,
-            'recorder': recorder,
-            'is_active': True,
-            'start_time': datetime.now(),
-            'user_id': user_id,
-            'total_duration': total_duration,
-            'chunk_duration': chunk_duration,
-            'session': session
-        }
         
         return jsonify({
             "message": f"Recording started for user {username}",
             "username": username,
+            "session_id": session.session_id,
             "total_duration_seconds": total_duration,
             "chunk_duration_seconds": chunk_duration,
+            "audio": audio or None,
             "expected_chunks": (total_duration + chunk_duration - 1) // chunk_duration
         }), 200
         
@@ -338,6 +443,167 @@ def recording_status(username):
         return jsonify({"error": str(e)}), 500
 
 
+# ==================== SCHEDULED RECORDINGS ====================
+
+@api_bp.route('/schedules', methods=['POST'])
+def create_schedule():
+    """
+    Schedule a one-off or recurring recording.
+    Request body: {
+        "username": "john_doe",
+        "run_at": "2026-03-01T09:00:00",    (one-off; or use time_of_day)
+        "time_of_day": "09:00",             (recurring start time)
+        "days_of_week": [0, 1, 2, 3, 4],    (optional, Monday=0; default: every day)
+        "duration_seconds": 900,            (optional, default: 900 = 15 min)
+        "chunk_duration_seconds": 180,      (optional, default: 180 = 3 min)
+        "device_index": 0                   (optional, default: 0)
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        username = data.get('username', '').strip()
+        run_at = data.get('run_at')
+        time_of_day = (data.get('time_of_day') or '').strip()
+        days_of_week = data.get('days_of_week')
+        duration = int(data.get('duration_seconds', 900))
+        chunk_duration = int(data.get('chunk_duration_seconds', 180))
+        device_index = int(data.get('device_index', 0))
+
+        if not username:
+            return jsonify({"error": "username is required"}), 400
+        if bool(run_at) == bool(time_of_day):
+            return jsonify({"error": "exactly one of run_at or time_of_day is required"}), 400
+
+        if run_at:
+            run_at = datetime.fromisoformat(run_at)
+            if run_at.tzinfo is not None:
+                # Schedules are stored and run in naive server-local time
+                run_at = run_at.astimezone().replace(tzinfo=None)
+            if run_at <= datetime.now():
+                return jsonify({"error": "run_at must be in the future"}), 400
+            days_of_week = None
+        else:
+            hour, minute = (int(part) for part in time_of_day.split(':'))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                return jsonify({"error": "time_of_day must be HH:MM"}), 400
+            time_of_day = f"{hour:02d}:{minute:02d}"
+            if days_of_week is not None and (
+                    not isinstance(days_of_week, list)
+                    or any(isinstance(d, bool) or not isinstance(d, int) for d in days_of_week)):
+                return jsonify({"error": "days_of_week must be a list of integers"}), 400
+            if days_of_week:
+                days = sorted(set(days_of_week))
+                if days[0] < 0 or days[-1] > 6:
+                    return jsonify({"error": "days_of_week values must be between 0 (Monday) and 6 (Sunday)"}), 400
+                days_of_week = ','.join(str(d) for d in days)
+            else:
+                days_of_week = None
+
+        # Same limits as a manual recording
+        if duration < 60:
+            return jsonify({"error": "duration_seconds must be at least 60 seconds"}), 400
+        if chunk_duration < 30:
+            return jsonify({"error": "chunk_duration_seconds must be at least 30 seconds"}), 400
+        if chunk_duration > duration:
+            return jsonify({"error": "chunk_duration_seconds cannot exceed duration_seconds"}), 400
+
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.username == username).first()
+            if not user:
+                return jsonify({"error": "User not found. Please register first."}), 404
+
+            schedule = RecordingSchedule(
+                user_id=user.id,
+                user_name=username,
+                run_at=run_at or None,
+                days_of_week=days_of_week,
+                time_of_day=time_of_day or None,
+                duration_seconds=duration,
+                chunk_duration_seconds=chunk_duration,
+                device_index=device_index,
+                enabled=True
+            )
+
+            existing = db.query(RecordingSchedule).filter(
+                RecordingSchedule.user_name == username,
+                RecordingSchedule.enabled == True  # noqa: E712
+            ).all()
+            conflict = find_overlap(schedule, existing, datetime.now())
+            if conflict:
+                return jsonify({
+                    "error": "Schedule overlaps an existing schedule for this user",
+                    "conflicting_schedule": conflict.to_dict()
+                }), 409
+
+            db.add(schedule)
+            db.commit()
+            schedule_data = schedule.to_dict()
+        finally:
+            db.close()
+
+        recording_scheduler.add_schedule(schedule_data['id'])
+
+        return jsonify({
+            "message": "Recording scheduled successfully",
+            "schedule": schedule_data
+        }), 201
+
+    except ValueError as e:
+        logger.error(f"Invalid schedule input: {e}")
+        return jsonify({"error": "Invalid parameter values. Check run_at, time_of_day and durations."}), 400
+    except Exception as e:
+        logger.error(f"Error creating schedule: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/schedules', methods=['GET'])
+def get_schedules():
+    """Get all recording schedules, optionally filtered by ?username="""
+    try:
+        username = request.args.get('username', '').strip()
+
+        db = SessionLocal()
+        query = db.query(RecordingSchedule)
+        if username:
+            query = query.filter(RecordingSchedule.user_name == username)
+        schedules = query.all()
+        db.close()
+
+        return jsonify({
+            "total_schedules": len(schedules),
+            "schedules": [schedule.to_dict() for schedule in schedules]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error fetching schedules: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/schedules/<int:schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    """Delete a recording schedule; a recording it already started keeps running"""
+    try:
+        db = SessionLocal()
+        schedule = db.query(RecordingSchedule).filter(RecordingSchedule.id == schedule_id).first()
+
+        if not schedule:
+            db.close()
+            return jsonify({"error": "Schedule not found"}), 404
+
+        db.delete(schedule)
+        db.commit()
+        db.close()
+
+        recording_scheduler.remove_schedule(schedule_id)
+
+        return jsonify({"message": "Schedule deleted successfully"}), 200
+
+    except Exception as e:
+        logger.error(f"Error deleting schedule: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ==================== VIDEO MANAGEMENT ====================
 
 @api_bp.route('/videos', methods=['GET'])
@@ -405,24 +671,186 @@ def download_video(chunk_id):
         return jsonify({"error": str(e)}), 500
 
 
+@api_bp.route('/video/<int:chunk_id>/audio', methods=['GET'])
+def download_audio(chunk_id):
+    """Download the audio track recorded with a video chunk"""
+    try:
+        db = SessionLocal()
+        track = db.query(AudioTrack).filter(AudioTrack.chunk_id == chunk_id).first()
+        db.close()
+        
+        if not track:
+            return jsonify({"error": "Audio track not found"}), 404
+        
+        if not os.path.exists(track.file_path):
+            return jsonify({"error": "Audio file not found on disk"}), 404
+        
+        return send_file(
+            os.path.abspath(track.file_path),
+            as_attachment=True,
+            download_name=track.file_name,
+            mimetype='audio/wav'
+        )
+        
+    except Exception as e:
+        logger.error(f"Error downloading audio: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @api_bp.route('/video/<int:chunk_id>', methods=['GET'])
 def get_video_details(chunk_id):
     """Get details of a specific video chunk"""
     try:
         db = SessionLocal()
         chunk = db.query(VideoChunk).filter(VideoChunk.id == chunk_id).first()
+        track = db.query(AudioTrack).filter(AudioTrack.chunk_id == chunk_id).first()
         db.close()
         
         if not chunk:
             return jsonify({"error": "Video chunk not found"}), 404
         
-        return jsonify(chunk.to_dict()), 200
+        details = chunk.to_dict()
+        details['audio'] = track.to_dict() if track else None
+        return jsonify(details), 200
         
     except Exception as e:
         logger.error(f"Error fetching video details: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@api_bp.route('/sessions/<session_id>/extract', methods=['GET'])
+def extract_session_clip(session_id):
+    """
+    Extract a time range from a recording session, across chunk boundaries.
+    Query params:
+        start: offset from session start, seconds or [hh:]mm:ss (e.g. 12:40)
+        end:   offset from session start, seconds or [hh:]mm:ss (e.g. 13:20)
+    """
+    try:
+        start_param = request.args.get('start', '')
+        end_param = request.args.get('end', '')
+        if not start_param or not end_param:
+            return jsonify({"error": "start and end are required"}), 400
+
+        start_seconds = parse_offset(start_param)
+        end_seconds = parse_offset(end_param)
+        if end_seconds <= start_seconds:
+            return jsonify({"error": "end must be after start"}), 400
+
+        db = SessionLocal()
+        try:
+            stored_start, first_start, session_end = db.query(
+                func.min(VideoChunk.session_start_time), func.min(VideoChunk.start_time), func.max(VideoChunk.end_time)
+            ).filter(VideoChunk.session_id == session_id).one()
+
+            if first_start is None:
+                return jsonify({"error": "Recording session not found"}), 404
+
+            # Offsets are measured from the stored session start so they keep their
+            # meaning when early chunks are deleted; chunks saved before it was
+            # stored fall back to the earliest remaining chunk
+            session_start = stored_start or first_start
+
+            # Clamp to what has been recorded so the cache key reflects the real range
+            session_length = (session_end - session_start).total_seconds()
+            end_seconds = min(end_seconds, session_length)
+            if start_seconds >= end_seconds:
+                return jsonify({"error": "Requested range is outside the recorded session"}), 416
+
+            range_start = session_start + timedelta(seconds=start_seconds)
+            range_end = session_start + timedelta(seconds=end_seconds)
+
+            # Use chunk start/end times as the index: only overlapping chunks are read
+            chunks = db.query(VideoChunk).filter(
+                VideoChunk.session_id == session_id,
+                VideoChunk.start_time < range_end,
+                VideoChunk.end_time > range_start
+            ).order_by(VideoChunk.start_time).all()
+        finally:
+            db.close()
+
+        clip_path = clip_extractor.extract(session_id, session_start, chunks, start_seconds, end_seconds)
+        if not clip_path:
+            return jsonify({"error": "No video frames found in the requested range"}), 404
+
+        return send_file(
+            os.path.abspath(clip_path),
+            as_attachment=True,
+            download_name=f"session_{session_id}_{int(start_seconds)}-{int(end_seconds)}.mp4",
+            mimetype='video/mp4',
+            conditional=True
+        )
+
+    except ValueError as e:
+        logger.error(f"Invalid extract request: {e}")
+        return jsonify({"error": "start and end must be seconds or [hh:]mm:ss"}), 400
+    except Exception as e:
+        logger.error(f"Error extracting clip: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/signatures', methods=['GET'])
+def get_signatures():
+    """
+    Get duplicate-detection results for indexed chunks.
+    Query params: username (optional), duplicates_only=true (optional)
+    """
+    try:
+        username = request.args.get('username', '').strip()
+        duplicates_only = request.args.get('duplicates_only', '').lower() in ('1', 'true', 'yes')
+
+        db = SessionLocal()
+        query = db.query(ChunkSignature)
+        if username:
+            query = query.filter(ChunkSignature.user_name == username)
+        if duplicates_only:
+            query = query.filter(ChunkSignature.duplicate_of.in_(db.query(VideoChunk.id)))
+        signatures = query.all()
+        db.close()
+
+        return jsonify({
+            "total_signatures": len(signatures),
+            "total_duplicates": sum(1 for s in signatures if s.duplicate_of),
+            "signatures": [signature.to_dict() for signature in signatures]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error fetching signatures: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/signatures/backfill', methods=['POST'])
+def backfill_signatures():
+    """
+    Index chunks that have no signature yet (e.g. recorded before indexing existed).
+    Request body: {
+        "limit": 500    (optional, default: all unscored chunks)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        limit = int(data.get('limit', 0)) or None
+
+        db = SessionLocal()
+        chunk_ids = unscored_chunk_ids(db, limit)
+        db.close()
+
+        for chunk_id in chunk_ids:
+            signature_executor.submit(score_chunk, chunk_id)
+
+        return jsonify({
+            "message": f"Queued {len(chunk_ids)} chunk(s) for indexing",
+            "queued": len(chunk_ids)
+        }), 202
+
+    except ValueError as e:
+        logger.error(f"Invalid backfill request: {e}")
+        return jsonify({"error": "limit must be an integer"}), 400
+    except Exception as e:
+        logger.error(f"Error queueing signature backfill: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @api_bp.route('/init-db', methods=['POST'])
 def initialize_database():
     """Initialize database tables"""
@@ -445,21 +873,327 @@ def delete_video(chunk_id):
             db.close()
             return jsonify({"error": "Video chunk not found"}), 404
         
-        # Delete file from disk
-        try:
-            if os.path.exists(chunk.file_path):
-                os.remove(chunk.file_path)
-        except Exception as e:
-            logger.warning(f"Could not delete file {chunk.file_path}: {e}")
+        audio_track = db.query(AudioTrack).filter(AudioTrack.chunk_id == chunk_id).first()
+        
+        # Delete files from disk
+        for file_path in [chunk.file_path] + ([audio_track.file_path] if audio_track else []):
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except Exception as e:
+                logger.warning(f"Could not delete file {file_path}: {e}")
         
         # Delete from database
+        reassign_runs(db, [chunk_id])
+        db.query(ChunkSignature).filter(ChunkSignature.chunk_id == chunk_id).delete(synchronize_session=False)
+        if audio_track:
+            db.delete(audio_track)
+        session_id = chunk.session_id
         db.delete(chunk)
         db.commit()
         db.close()
         
+        # Cached extracts may contain footage from the deleted chunk
+        if session_id:
+            clip_extractor.purge_session(session_id)
+        
         return jsonify({"message": "Video chunk deleted successfully"}), 200
         
     except Exception as e:
         logger.error(f"Error deleting video: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+# ==================== BULK OPERATIONS ====================
+
+def _parse_id_list(value):
+    """Accept a JSON list or a comma separated string of chunk ids"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = [v for v in value.split(',') if v.strip()]
+    if not isinstance(value, list):
+        raise ValueError("ids must be a list or a comma separated string")
+    if any(isinstance(v, bool) or not isinstance(v, (int, str)) for v in value):
+        raise ValueError("ids must contain only integers")
+    return [int(v) for v in value]
+
+
+def _string_param(params, name):
+    """Optional string selector; raises ValueError for other JSON types"""
+    value = params.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value.strip()
+
+
+def _bulk_selection_query(db, params):
+    """
+    Build a VideoChunk query from bulk selection parameters.
+    Supported keys (combined with AND): ids, username, session_id,
+    start_date, end_date (ISO 8601, matched against chunk start_time) and
+    duplicates_only (only chunks indexed as duplicates of an earlier chunk).
+    Raises ValueError if no selector is given or a value is malformed.
+    """
+    ids = _parse_id_list(params.get('ids'))
+    username = _string_param(params, 'username')
+    session_id = _string_param(params, 'session_id')
+    start_date = _string_param(params, 'start_date')
+    end_date = _string_param(params, 'end_date')
+    duplicates_only = str(params.get('duplicates_only', '')).lower() in ('1', 'true', 'yes')
+
+    if ids is None and not duplicates_only and not username and not session_id and not start_date and not end_date:
+        raise ValueError("at least one of ids, username, session_id, start_date, end_date or duplicates_only is required")
+
+    query = db.query(VideoChunk)
+    if ids is not None:
+        query = query.filter(VideoChunk.id.in_(ids))
+    if username:
+        query = query.filter(VideoChunk.user_name == username)
+    if session_id:
+        query = query.filter(VideoChunk.session_id == session_id)
+    if start_date:
+        query = query.filter(VideoChunk.start_time >= datetime.fromisoformat(start_date))
+    if end_date:
+        query = query.filter(VideoChunk.start_time < datetime.fromisoformat(end_date))
+    if duplicates_only:
+        # Only chunks whose run's first chunk still exists, so the last copy is never selected
+        query = query.filter(VideoChunk.id.in_(
+            db.query(ChunkSignature.chunk_id).filter(
+                ChunkSignature.duplicate_of.in_(db.query(VideoChunk.id))
+            )
+        ))
+    return query
+
+
+def _remove_file(file_path):
+    """Unlink a chunk file, returning an error message or None"""
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+@api_bp.route('/videos/bulk-delete', methods=['POST'])
+def bulk_delete_videos():
+    """
+    Delete many video chunks in one transaction.
+    Request body (selectors are combined with AND): {
+        "ids": [1, 2, 3],                       (optional)
+        "username": "john_doe",                 (optional)
+        "session_id": "9f1c...",                (optional)
+        "duplicates_only": true,                (optional)
+        "start_date": "2026-01-01T00:00:00",    (optional)
+        "end_date": "2026-02-01T00:00:00"       (optional)
+    }
+    Rows are removed with a single set-based DELETE; files are then
+    unlinked in a worker pool and any failures are reported per file.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+
+        db = SessionLocal()
+        try:
+            query = _bulk_selection_query(db, data)
+            rows = query.with_entities(VideoChunk.id, VideoChunk.file_path, VideoChunk.session_id).all()
+            chunk_ids = [row.id for row in rows]
+            files = [(row.id, row.file_path) for row in rows]
+            if chunk_ids:
+                files += [(track.chunk_id, track.file_path) for track in db.query(
+                    AudioTrack.chunk_id, AudioTrack.file_path
+                ).filter(AudioTrack.chunk_id.in_(chunk_ids)).all()]
+
+                reassign_runs(db, chunk_ids)
+                db.query(VideoChunk).filter(
+                    VideoChunk.id.in_(chunk_ids)
+                ).delete(synchronize_session=False)
+                db.query(ChunkSignature).filter(
+                    ChunkSignature.chunk_id.in_(chunk_ids)
+                ).delete(synchronize_session=False)
+                db.query(AudioTrack).filter(
+                    AudioTrack.chunk_id.in_(chunk_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        # Cached extracts may contain footage from the deleted chunks
+        for session_id in {row.session_id for row in rows if row.session_id}:
+            clip_extractor.purge_session(session_id)
+
+        failed_files = []
+        if files:
+            with ThreadPoolExecutor(max_workers=BULK_DELETE_WORKERS) as pool:
+                errors = pool.map(_remove_file, [file_path for _, file_path in files])
+                for (chunk_id, file_path), error in zip(files, errors):
+                    if error:
+                        logger.warning(f"Could not delete file {file_path}: {error}")
+                        failed_files.append({
+                            "id": chunk_id,
+                            "file_path": file_path,
+                            "error": error
+                        })
+
+        return jsonify({
+            "message": f"Deleted {len(chunk_ids)} video chunk(s)",
+            "deleted_count": len(chunk_ids),
+            "deleted_ids": chunk_ids,
+            "failed_files": failed_files
+        }), 200
+
+    except ValueError as e:
+        logger.error(f"Invalid bulk delete request: {e}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error bulk deleting videos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+class _StreamBuffer:
+    """Write-only file object that hands written bytes to a generator"""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _iter_file(file_path):
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(EXPORT_READ_SIZE)
+            if not block:
+                break
+            yield block
+
+
+def _stream_zip(chunks):
+    """Yield a zip archive of the given chunks without staging it on disk"""
+    buffer = _StreamBuffer()
+    # The buffer is not seekable, so zipfile writes data descriptors
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, file_path in chunks:
+            with archive.open(arcname, 'w', force_zip64=True) as dest:
+                for block in _iter_file(file_path):
+                    dest.write(block)
+                    yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _stream_tar(chunks):
+    """Yield a tar archive of the given chunks without staging it on disk"""
+    for arcname, file_path in chunks:
+        stat = os.stat(file_path)
+        info = tarfile.TarInfo(name=arcname)
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+
+        written = 0
+        for block in _iter_file(file_path):
+            # Guard against the file growing after the header was written
+            block = block[:info.size - written]
+            written += len(block)
+            yield block
+            if written >= info.size:
+                break
+        if written < info.size:
+            yield b'\0' * (info.size - written)
+
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield b'\0' * (tarfile.BLOCKSIZE - remainder)
+    yield b'\0' * (tarfile.BLOCKSIZE * 2)
+
+
+@api_bp.route('/videos/export', methods=['GET'])
+def export_videos():
+    """
+    Stream an archive of selected video chunks and their audio tracks.
+    Query params: the same selectors as bulk-delete (ids as a comma
+    separated list) plus format=zip|tar (default: zip).
+    """
+    try:
+        archive_format = request.args.get('format', 'zip').lower()
+        if archive_format not in ('zip', 'tar'):
+            return jsonify({"error": "format must be zip or tar"}), 400
+
+        db = SessionLocal()
+        try:
+            chunks = _bulk_selection_query(db, request.args).order_by(
+                VideoChunk.user_name, VideoChunk.start_time
+            ).all()
+            tracks = {}
+            if chunks:
+                # Audio side-cars travel with their clips
+                tracks = {track.chunk_id: track for track in db.query(AudioTrack).filter(
+                    AudioTrack.chunk_id.in_([chunk.id for chunk in chunks])
+                ).all()}
+        finally:
+            db.close()
+
+        if not chunks:
+            return jsonify({"error": "No video chunks matched the selection"}), 404
+
+        entries = []
+        missing = 0
+        for chunk in chunks:
+            if not os.path.exists(chunk.file_path):
+                logger.warning(f"Skipping missing file during export: {chunk.file_path}")
+                missing += 1
+                continue
+            entries.append((f"{chunk.user_name}/{chunk.id}_{chunk.file_name}", chunk.file_path))
+
+            track = tracks.get(chunk.id)
+            if track is None:
+                continue
+            if not os.path.exists(track.file_path):
+                logger.warning(f"Skipping missing audio file during export: {track.file_path}")
+                missing += 1
+                continue
+            entries.append((f"{chunk.user_name}/{chunk.id}_{track.file_name}", track.file_path))
+
+        if not entries:
+            return jsonify({"error": "None of the selected video files exist on disk"}), 404
+
+        if archive_format == 'zip':
+            generator, mimetype = _stream_zip(entries), 'application/zip'
+        else:
+            generator, mimetype = _stream_tar(entries), 'application/x-tar'
+
+        download_name = f"videos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{archive_format}"
+        return Response(
+            stream_with_context(block for block in generator if block),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename={download_name}",
+                "X-Exported-Files": str(len(entries)),
+                "X-Missing-Files": str(missing)
+            }
+        )
+
+    except ValueError as e:
+        logger.error(f"Invalid export request: {e}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error exporting videos: {e}")
+        return jsonify({"error": str(e)}), 500
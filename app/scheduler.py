@@ -0,0 +1,411 @@
+from database import SessionLocal
+from models import RecordingSchedule
+from video_recorder import VideoRecorder
+from datetime import datetime, timedelta, time
+import math
+import threading
+import time as monotonic_time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a window starts at which the capture device is opened
+PREWARM_SECONDS = 5
+
+# Shortest remaining window worth starting when recovering a missed start
+MIN_RECOVERY_SECONDS = 30
+
+
+def parse_days_of_week(value):
+    """Return the set of weekdays (Monday=0) a schedule runs on, or None for every day"""
+    if not value:
+        return None
+    return {int(d) for d in value.split(',')}
+
+
+def occurrences_between(schedule, start, end):
+    """
+    Yield the start times of a schedule's windows that begin in [start, end).
+    One-off schedules have a single occurrence at run_at; recurring schedules
+    start at time_of_day on each matching weekday.
+    """
+    if schedule.run_at is not None:
+        if start <= schedule.run_at < end:
+            yield schedule.run_at
+        return
+
+    days = parse_days_of_week(schedule.days_of_week)
+    hour, minute = (int(part) for part in schedule.time_of_day.split(':'))
+    day = start.date()
+    while day <= end.date():
+        if days is None or day.weekday() in days:
+            candidate = datetime.combine(day, time(hour, minute))
+            if start <= candidate < end:
+                yield candidate
+        day += timedelta(days=1)
+
+
+def next_occurrence(schedule, after):
+    """Return the first window start strictly after `after`, or None"""
+    return next(occurrences_between(
+        schedule, after + timedelta(microseconds=1), after + timedelta(days=8)
+    ), None)
+
+
+def find_overlap(schedule, others, now):
+    """
+    Return the first schedule in `others` whose windows overlap `schedule`'s.
+    Two recurring schedules are compared over the next week; a pair involving
+    a one-off is compared around its run_at, however far ahead that is, so the
+    result does not depend on which of the two was created first.
+    """
+    def windows(s, start, end):
+        length = timedelta(seconds=s.duration_seconds)
+        return [(o, o + length) for o in occurrences_between(s, start - length, end)]
+
+    for other in others:
+        run_ats = [s.run_at for s in (schedule, other) if s.run_at is not None]
+        if run_ats:
+            start, end = min(run_ats), max(run_ats) + timedelta(days=1)
+        else:
+            start, end = now, now + timedelta(days=8)
+
+        own_windows = windows(schedule, start, end)
+        for other_start, other_end in windows(other, start, end):
+            for own_start, own_end in own_windows:
+                if own_start < other_end and other_start < own_end:
+                    return other
+    return None
+
+
+class _Timer:
+    """Entry in a TimerWheel slot"""
+    def __init__(self, callback, rounds):
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel driven by a single thread.
+    Timers are bucketed by tick; those further out than one revolution carry
+    a round count, so adding and cancelling are O(1) regardless of how many
+    schedules are armed.
+    """
+
+    def __init__(self, tick_seconds=0.25, wheel_size=14400):
+        """
+        Initialize the timer wheel.
+
+        Args:
+            tick_seconds: Timer resolution in seconds (default: 0.25)
+            wheel_size: Number of slots; one revolution covers tick_seconds * wheel_size
+        """
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self.slots = [[] for _ in range(wheel_size)]
+        self.current_tick = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def schedule(self, delay_seconds, callback):
+        """Run callback after delay_seconds (never early); returns a cancellable timer"""
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        with self._lock:
+            timer = _Timer(callback, (ticks - 1) // self.wheel_size)
+            self.slots[(self.current_tick + ticks) % self.wheel_size].append(timer)
+        return timer
+
+    def advance(self):
+        """Move the wheel forward one tick and run the timers that are due"""
+        with self._lock:
+            self.current_tick += 1
+            index = self.current_tick % self.wheel_size
+            due = []
+            pending = []
+            for timer in self.slots[index]:
+                if timer.rounds == 0:
+                    due.append(timer)
+                else:
+                    timer.rounds -= 1
+                    pending.append(timer)
+            self.slots[index] = pending
+
+        for timer in due:
+            if timer.cancelled:
+                continue
+            timer.fired = True
+            try:
+                timer.callback()
+            except Exception as e:
+                logger.error(f"Error in scheduled timer: {e}")
+
+    def _run(self):
+        started = monotonic_time.monotonic()
+        ticks_done = 0
+        while not self._stop_event.is_set():
+            # Sleep until the next tick boundary; catches up if callbacks ran long
+            target = started + (ticks_done + 1) * self.tick_seconds
+            wait = target - monotonic_time.monotonic()
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+            self.advance()
+            ticks_done += 1
+
+    def start(self):
+        """Start the wheel thread"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="timer-wheel")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the wheel thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class RecordingScheduler:
+    """
+    Starts and stops recordings for the windows stored in recording_schedules.
+    The capture device is prewarmed shortly before each window, windows that
+    were missed while the server was down are resumed on startup if they are
+    still open, and windows that would overlap an active recording are skipped.
+    """
+
+    def __init__(self, start_session, is_recording, prewarm_seconds=PREWARM_SECONDS, output_dir="recordings",
+                 recorder_class=VideoRecorder):
+        """
+        Initialize the scheduler.
+
+        Args:
+            start_session: callable(username, user_id, total_duration, chunk_duration, recorder)
+                           that starts recording with the given recorder
+            is_recording: callable(username) -> True if the user is already recording
+            prewarm_seconds: Seconds before a window to open the capture device
+            output_dir: Directory recorders write chunks to
+            recorder_class: VideoRecorder (sub)class used to record
+        """
+        self.start_session = start_session
+        self.is_recording = is_recording
+        self.prewarm_seconds = prewarm_seconds
+        self.output_dir = output_dir
+        self.recorder_class = recorder_class
+        self.wheel = TimerWheel()
+        self._timers = {}      # schedule_id -> list of armed timers
+        self._prewarmed = {}   # (schedule_id, occurrence) -> VideoRecorder
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Load enabled schedules, recover missed windows and start the wheel"""
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            schedules = db.query(RecordingSchedule).filter(RecordingSchedule.enabled == True).all()  # noqa: E712
+        finally:
+            db.close()
+
+        for schedule in schedules:
+            self._recover_missed(schedule, now)
+            self._arm(schedule, now)
+
+        self.wheel.start()
+        logger.info(f"Recording scheduler started with {len(schedules)} schedule(s)")
+
+    def stop(self):
+        """Stop the wheel and release any prewarmed devices"""
+        self.wheel.stop()
+        with self._lock:
+            for recorder in self._prewarmed.values():
+                recorder.release_capture()
+            self._prewarmed.clear()
+            self._timers.clear()
+
+    def add_schedule(self, schedule_id):
+        """Arm a newly created schedule"""
+        schedule = self._load(schedule_id)
+        if schedule is not None and schedule.enabled:
+            self._arm(schedule, datetime.now())
+
+    def remove_schedule(self, schedule_id):
+        """Cancel all pending timers for a schedule"""
+        with self._lock:
+            for timer in self._timers.pop(schedule_id, []):
+                timer.cancel()
+            for key in [k for k in self._prewarmed if k[0] == schedule_id]:
+                self._prewarmed.pop(key).release_capture()
+
+    def _load(self, schedule_id):
+        db = SessionLocal()
+        try:
+            return db.query(RecordingSchedule).filter(RecordingSchedule.id == schedule_id).first()
+        finally:
+            db.close()
+
+    def _add_timer(self, schedule_id, at, callback):
+        delay = (at - datetime.now()).total_seconds()
+        timer = self.wheel.schedule(max(0, delay), callback)
+        with self._lock:
+            self._timers.setdefault(schedule_id, []).append(timer)
+
+    def _arm(self, schedule, after):
+        """Set prewarm and start timers for the schedule's next window"""
+        occurrence = next_occurrence(schedule, after)
+        if occurrence is None:
+            return
+
+        schedule_id = schedule.id
+        with self._lock:
+            # Drop timers that have already fired
+            self._timers[schedule_id] = [
+                t for t in self._timers.get(schedule_id, []) if not (t.cancelled or t.fired)
+            ]
+
+        prewarm_at = occurrence - timedelta(seconds=self.prewarm_seconds)
+        if prewarm_at > datetime.now():
+            self._add_timer(schedule_id, prewarm_at, lambda: self._on_prewarm(schedule_id, occurrence))
+        self._add_timer(schedule_id, occurrence, lambda: self._on_start(schedule_id, occurrence))
+        logger.info(f"Schedule {schedule_id} for {schedule.user_name} armed for {occurrence.isoformat()}")
+
+    def _recover_missed(self, schedule, now):
+        """
+        Resume a window that is still open when the scheduler starts, e.g. after
+        a restart in the middle of a recording, unless this process is already
+        recording for the user.
+        """
+        length = timedelta(seconds=schedule.duration_seconds)
+        windows = list(occurrences_between(schedule, now - length, now + timedelta(microseconds=1)))
+        if not windows:
+            if schedule.run_at is not None and schedule.run_at < now:
+                # The one-off window closed while the server was down
+                if schedule.last_started_at is None:
+                    logger.warning(f"Schedule {schedule.id} missed its one-off window at {schedule.run_at.isoformat()}")
+                self._mark_started(schedule.id, None, disable=True)
+            return
+
+        occurrence = windows[-1]
+        remaining = (occurrence + length - now).total_seconds()
+        if remaining < MIN_RECOVERY_SECONDS:
+            logger.warning(f"Schedule {schedule.id} window at {occurrence.isoformat()} has too little time left to resume")
+            self._arm_window_end(schedule, occurrence, None)
+            return
+
+        logger.info(f"Schedule {schedule.id} resuming window at {occurrence.isoformat()}")
+        self._launch(schedule, occurrence, remaining, None)
+
+    def _on_prewarm(self, schedule_id, occurrence):
+        schedule = self._load(schedule_id)
+        if schedule is None or not schedule.enabled or self.is_recording(schedule.user_name):
+            return
+
+        recorder = self.recorder_class(
+            user_name=schedule.user_name,
+            chunk_duration_seconds=schedule.chunk_duration_seconds,
+            total_duration_seconds=schedule.duration_seconds,
+            output_dir=self.output_dir,
+            device_index=schedule.device_index
+        )
+        with self._lock:
+            self._prewarmed[(schedule_id, occurrence)] = recorder
+
+        # Opening a camera can block for seconds; keep it off the wheel thread
+        thread = threading.Thread(target=recorder.prewarm)
+        thread.daemon = True
+        thread.start()
+
+    def _on_start(self, schedule_id, occurrence):
+        with self._lock:
+            recorder = self._prewarmed.pop((schedule_id, occurrence), None)
+
+        schedule = self._load(schedule_id)
+        if schedule is None or not schedule.enabled:
+            if recorder is not None:
+                recorder.release_capture()
+            return
+
+        remaining = (occurrence - datetime.now()).total_seconds() + schedule.duration_seconds
+        self._launch(schedule, occurrence, remaining, recorder)
+        self._arm(schedule, occurrence)
+
+    def _launch(self, schedule, occurrence, duration, recorder):
+        """Start recording for a window and arm the timer that ends it"""
+        if self.is_recording(schedule.user_name):
+            logger.warning(f"Schedule {schedule.id} skipped: {schedule.user_name} is already recording")
+            if recorder is not None:
+                recorder.release_capture()
+            self._arm_window_end(schedule, occurrence, None)
+            return
+
+        duration = int(duration)
+        chunk_duration = min(schedule.chunk_duration_seconds, duration)
+        # Every window, including one resumed after a restart, records with its
+        # own recorder and therefore its own session id and chunk file names, so
+        # it never overwrites an earlier window's clips
+        if recorder is None:
+            recorder = self.recorder_class(
+                user_name=schedule.user_name,
+                chunk_duration_seconds=chunk_duration,
+                total_duration_seconds=duration,
+                output_dir=self.output_dir,
+                device_index=schedule.device_index
+            )
+        else:
+            recorder.chunk_duration = chunk_duration
+            recorder.total_duration = duration
+
+        try:
+            self.start_session(schedule.user_name, schedule.user_id, duration, chunk_duration, recorder)
+        except Exception as e:
+            logger.error(f"Error starting scheduled recording {schedule.id}: {e}")
+            recorder.release_capture()
+            self._arm_window_end(schedule, occurrence, None)
+            return
+
+        self._mark_started(schedule.id, occurrence)
+        self._arm_window_end(schedule, occurrence, recorder)
+
+    def _arm_window_end(self, schedule, occurrence, recorder):
+        """
+        At the end of the window stop its recording and retire one-off schedules.
+        One-off schedules stay enabled until then so a restart mid-window resumes them.
+        """
+        schedule_id = schedule.id
+        one_off = schedule.run_at is not None
+        window_end = occurrence + timedelta(seconds=schedule.duration_seconds)
+
+        def on_window_end():
+            # The recorder also stops itself, but its clock starts only once the
+            # camera is open; this pins the end to the scheduled time
+            if recorder is not None:
+                recorder.stop_recording()
+            if one_off:
+                self._mark_started(schedule_id, None, disable=True)
+
+        self._add_timer(schedule_id, window_end, on_window_end)
+
+    def _mark_started(self, schedule_id, occurrence, disable=False):
+        db = SessionLocal()
+        try:
+            schedule = db.query(RecordingSchedule).filter(RecordingSchedule.id == schedule_id).first()
+            if schedule is None:
+                return
+            if occurrence is not None:
+                schedule.last_started_at = occurrence
+            if disable:
+                schedule.enabled = False
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating schedule {schedule_id}: {e}")
+        finally:
+            db.close()
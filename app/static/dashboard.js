@@ -2,6 +2,10 @@
 const API_BASE = '/api';
 let allVideos = [];
 let allUsers = [];
+let selectedVideoIds = new Set();
+let duplicateOf = {};
+let expandedRuns = new Set();
+let displayedVideos = [];
 
 /**
  * Format date to readable format
@@ -61,6 +65,7 @@ async function loadAllVideos() {
         
         if (response.ok) {
             allVideos = data.chunks;
+            await loadSignatures();
             displayVideos(allVideos);
             updateStatistics(allVideos);
         } else {
@@ -72,6 +77,37 @@ async function loadAllVideos() {
     }
 }
 
+/**
+ * Load duplicate-detection results so runs of identical chunks can be collapsed
+ */
+async function loadSignatures() {
+    try {
+        const response = await fetch(`${API_BASE}/signatures?duplicates_only=true`);
+        const data = await response.json();
+        
+        if (response.ok) {
+            duplicateOf = {};
+            data.signatures.forEach(signature => {
+                duplicateOf[signature.chunk_id] = signature.duplicate_of;
+            });
+        }
+    } catch (error) {
+        console.error('Error loading signatures:', error);
+    }
+}
+
+/**
+ * Show or hide the identical chunks collapsed under a run's first chunk
+ */
+function toggleRun(rootId) {
+    if (expandedRuns.has(rootId)) {
+        expandedRuns.delete(rootId);
+    } else {
+        expandedRuns.add(rootId);
+    }
+    displayVideos(displayedVideos);
+}
+
 /**
  * Load all users from the server
  */
@@ -112,14 +148,33 @@ function populateUserFilter() {
  */
 function displayVideos(videos) {
     const container = document.getElementById('videosContainer');
+    displayedVideos = videos;
     
     if (videos.length === 0) {
         container.innerHTML = '<p class="loading">No videos found</p>';
         return;
     }
     
-    container.innerHTML = videos.map(video => `
+    // Collapse chunks that are identical to the first chunk of their run
+    const shownIds = new Set(videos.map(v => v.id));
+    const runSizes = {};
+    videos.forEach(video => {
+        const rootId = duplicateOf[video.id];
+        if (rootId && shownIds.has(rootId)) {
+            runSizes[rootId] = (runSizes[rootId] || 0) + 1;
+        }
+    });
+    const visible = videos.filter(video => {
+        const rootId = duplicateOf[video.id];
+        return !(rootId && shownIds.has(rootId) && !expandedRuns.has(rootId));
+    });
+    
+    container.innerHTML = visible.map(video => `
         <div class="video-card">
+            <label class="video-select">
+                <input type="checkbox" onchange="toggleSelection(${video.id}, this.checked)" ${selectedVideoIds.has(video.id) ? 'checked' : ''}>
+                Select
+            </label>
             <h3>📹 ${video.file_name}</h3>
             <p><span class="label">User:</span> <span class="value">${video.user_name}</span></p>
             <p><span class="label">Duration:</span> <span class="value">${calculateDuration(video.record_start_time, video.record_end_time)}</span></p>
@@ -128,6 +183,12 @@ function displayVideos(videos) {
             <p><span class="label">Start Time:</span> <span class="value">${formatDate(video.record_start_time)}</span></p>
             <p><span class="label">End Time:</span> <span class="value">${formatDate(video.record_end_time)}</span></p>
             <p><span class="label">Recorded:</span> <span class="value">${formatDate(video.created_at)}</span></p>
+            ${runSizes[video.id] ? `
+            <button class="btn btn-run" onclick="toggleRun(${video.id})">
+                🔁 ${expandedRuns.has(video.id) ? 'Hide' : 'Show'} ${runSizes[video.id]} identical chunk(s)
+            </button>` : ''}
+            ${duplicateOf[video.id] && shownIds.has(duplicateOf[video.id]) ? `
+            <p><span class="label">Identical to:</span> <span class="value">#${duplicateOf[video.id]}</span></p>` : ''}
             
             <div class="video-actions">
                 <button class="btn btn-play" onclick="playVideo(${video.id})">▶️ Play</button>
@@ -276,6 +337,71 @@ async function deleteVideo(videoId) {
     }
 }
 
+/**
+ * Add or remove a video from the bulk selection
+ */
+function toggleSelection(videoId, checked) {
+    if (checked) {
+        selectedVideoIds.add(videoId);
+    } else {
+        selectedVideoIds.delete(videoId);
+    }
+}
+
+/**
+ * Delete all selected videos in one request
+ */
+async function deleteSelected() {
+    if (selectedVideoIds.size === 0) {
+        showMessage('No videos selected', 'info');
+        return;
+    }
+    
+    if (!confirm(`Are you sure you want to delete ${selectedVideoIds.size} video(s)? This action cannot be undone.`)) {
+        return;
+    }
+    
+    try {
+        const response = await fetch(`${API_BASE}/videos/bulk-delete`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ids: Array.from(selectedVideoIds) })
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok) {
+            if (data.failed_files.length > 0) {
+                showMessage(`Deleted ${data.deleted_count} video(s), ${data.failed_files.length} file(s) could not be removed`, 'error');
+            } else {
+                showMessage(`✅ Deleted ${data.deleted_count} video(s)`, 'success');
+            }
+            selectedVideoIds.clear();
+            loadAllVideos();
+        } else {
+            showMessage(`Error: ${data.error}`, 'error');
+        }
+    } catch (error) {
+        console.error('Error deleting videos:', error);
+        showMessage('Failed to delete videos', 'error');
+    }
+}
+
+/**
+ * Download all selected videos as a single zip archive
+ */
+function exportSelected() {
+    if (selectedVideoIds.size === 0) {
+        showMessage('No videos selected', 'info');
+        return;
+    }
+    
+    const a = document.createElement('a');
+    a.href = `${API_BASE}/videos/export?ids=${Array.from(selectedVideoIds).join(',')}`;
+    a.click();
+    showMessage(`✅ Exporting ${selectedVideoIds.size} video(s)...`, 'success');
+}
+
 /**
  * Apply filter by user name
  */
@@ -1,8 +1,11 @@
 import cv2
+import numpy as np
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 import threading
+import time
+import uuid
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -14,7 +17,8 @@ class VideoRecorder:
     Records video in chunks of specified duration (default: 3 minutes).
     """
     
-    def __init__(self, user_name, chunk_duration_seconds=180, total_duration_seconds=900, output_dir="recordings"):
+    def __init__(self, user_name, chunk_duration_seconds=180, total_duration_seconds=900, output_dir="recordings",
+                 device_index=0, audio_recorder=None):
         """
         Initialize the video recorder.
         
@@ -23,6 +27,9 @@ class VideoRecorder:
             chunk_duration_seconds: Duration of each chunk in seconds (default: 180 = 3 minutes)
             total_duration_seconds: Total recording duration in seconds (default: 900 = 15 minutes)
             output_dir: Directory to save video chunks
+            device_index: OpenCV capture device to record from (default: 0)
+            audio_recorder: Optional AudioRecorder; its audio is cut on the same
+                            chunk boundaries and saved next to each clip as a WAV
         """
         self.user_name = user_name
         self.chunk_duration = chunk_duration_seconds
@@ -30,6 +37,13 @@ class VideoRecorder:
         self.output_dir = output_dir
         self.is_recording = False
         self.video_chunks = []
+        self.device_index = device_index
+        self.audio_recorder = audio_recorder
+        self.session_id = uuid.uuid4().hex
+        
+        # Capture opened ahead of time by prewarm(), handed over to record_video()
+        self._capture = None
+        self._capture_lock = threading.Lock()
         
         # Create output directory if it doesn't exist
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
@@ -41,9 +55,58 @@ class VideoRecorder:
         self.frame_height = 480
         
     def get_chunk_filename(self, chunk_number):
-        """Generate chunk filename matching spec: clip_<clip_id>.mp4"""
-        # Using chunk_number as clip_id; full tracking happens in DB
-        return f"clip_{chunk_number}.mp4"
+        """Generate chunk filename: <session prefix>_clip_<clip_id>.mp4"""
+        # Using chunk_number as clip_id; full tracking happens in DB. Every session
+        # numbers its clips from 1, so the prefix keeps sessions from overwriting
+        # each other's files and colliding on video_chunks.file_name
+        return f"{self.session_id[:12]}_clip_{chunk_number}.mp4"
+    
+    def _open_capture(self):
+        """Open and configure the capture device, or return None if unavailable"""
+        cap = cv2.VideoCapture(self.device_index)
+        
+        if not cap.isOpened():
+            return None
+        
+        # Set camera resolution
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        return cap
+    
+    def prewarm(self, warmup_frames=15):
+        """
+        Open the capture device before recording starts.
+        
+        Cameras often take a few seconds to initialize and deliver dark or
+        unfocused frames at first; opening early and discarding those frames
+        means the first recorded frame is usable.
+        
+        Args:
+            warmup_frames: Number of initial frames to read and discard
+        """
+        with self._capture_lock:
+            if self._capture is not None:
+                return True
+            
+            cap = self._open_capture()
+            if cap is None:
+                logger.error(f"Cannot open capture device {self.device_index} for prewarm")
+                return False
+            
+            for _ in range(warmup_frames):
+                cap.read()
+            
+            self._capture = cap
+            logger.info(f"Capture device {self.device_index} prewarmed for {self.user_name}")
+            return True
+    
+    def release_capture(self):
+        """Release a prewarmed capture device that will not be used"""
+        with self._capture_lock:
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
     
     def record_video(self, callback=None):
         """
@@ -53,16 +116,23 @@ class VideoRecorder:
             callback: Optional callback function to be called when each chunk is saved
                      callback(chunk_info) where chunk_info is a dict with chunk metadata
         """
-        cap = cv2.VideoCapture(0)  # 0 for default webcam
+        # Use the prewarmed capture if there is one; waits for an in-progress prewarm
+        with self._capture_lock:
+            cap, self._capture = self._capture, None
         
-        if not cap.isOpened():
+        if cap is None:
+            cap = self._open_capture()
+        
+        if cap is None:
             logger.error("Cannot open webcam")
             return False
         
-        # Set camera resolution
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.audio_recorder:
+            try:
+                self.audio_recorder.start()
+            except Exception as e:
+                logger.error(f"Cannot start audio capture, recording video only: {e}")
+                self.audio_recorder = None
         
         self.is_recording = True
         recording_start_time = datetime.now()
@@ -93,6 +163,9 @@ class VideoRecorder:
                 frame_count = 0
                 target_frames = int(self.chunk_duration * self.fps)
                 
+                # Chunk boundaries on the monotonic clock shared with audio capture
+                chunk_start_clock = time.monotonic()
+                
                 while frame_count < target_frames and self.is_recording:
                     ret, frame = cap.read()
                     
@@ -111,12 +184,17 @@ class VideoRecorder:
                     out.write(frame)
                     frame_count += 1
                     
+                    # Keep the audio ring from filling up between chunk boundaries
+                    if self.audio_recorder and frame_count % self.fps == 0:
+                        self.audio_recorder.drain()
+                    
                     # Check if total recording time exceeded
                     elapsed_time = (datetime.now() - recording_start_time).total_seconds()
                     if elapsed_time >= self.total_duration:
                         self.is_recording = False
                         break
                 
+                chunk_end_clock = time.monotonic()
                 out.release()
                 chunk_end_time = datetime.now()
                 
@@ -128,9 +206,20 @@ class VideoRecorder:
                     'file_path': chunk_path,
                     'record_start_time': chunk_start_time,
                     'record_end_time': chunk_end_time,
-                    'duration': (chunk_end_time - chunk_start_time).total_seconds()
+                    'duration': (chunk_end_time - chunk_start_time).total_seconds(),
+                    'frame_count': frame_count
                 }
                 
+                if self.audio_recorder:
+                    audio_path = os.path.splitext(chunk_path)[0] + '.wav'
+                    try:
+                        chunk_info['audio'] = self.audio_recorder.write_segment(
+                            chunk_start_clock, chunk_end_clock, audio_path,
+                            video_frames=frame_count, fps=self.fps
+                        )
+                    except Exception as e:
+                        logger.error(f"Error writing audio for chunk {chunk_number}: {e}")
+                
                 self.video_chunks.append(chunk_info)
                 logger.info(f"Chunk {chunk_number} saved: {chunk_filename}")
                 
@@ -152,6 +241,8 @@ class VideoRecorder:
             return False
         finally:
             cap.release()
+            if self.audio_recorder:
+                self.audio_recorder.stop()
             cv2.destroyAllWindows()
     
     def start_recording_thread(self, callback=None):
@@ -169,3 +260,47 @@ class VideoRecorder:
     def get_chunks(self):
         """Return list of recorded chunks"""
         return self.video_chunks
+
+
+class SyntheticCapture:
+    """
+    Stand-in for cv2.VideoCapture that generates frames at a steady rate.
+    Used in test mode so recordings can run without a webcam.
+    """
+    
+    def __init__(self, width, height, fps):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_number = 0
+        self.started = time.monotonic()
+        self.background = np.full((height, width, 3), 40, dtype=np.uint8)
+    
+    def isOpened(self):
+        return True
+    
+    def set(self, prop, value):
+        return True
+    
+    def read(self):
+        # Pace frames like a real camera would deliver them
+        due = self.started + self.frame_number / self.fps
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        
+        frame = self.background.copy()
+        x = (self.frame_number * 4) % self.width
+        frame[self.height // 2 - 20:self.height // 2 + 20, x:x + 40] = (0, 0, 255)
+        self.frame_number += 1
+        return True, frame
+    
+    def release(self):
+        pass
+
+
+class SyntheticVideoRecorder(VideoRecorder):
+    """VideoRecorder that records synthetic frames instead of the webcam"""
+    
+    def _open_capture(self):
+        return SyntheticCapture(self.frame_width, self.frame_height, self.fps)